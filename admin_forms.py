@@ -2,13 +2,67 @@ import streamlit as st
 import sqlite3
 import random
 import os
+import csv
+from collections import Counter
+from datetime import datetime
+import shutil
 import pandas as pd
-from database_ops import get_db_connection, fetch_metadata, save_bill_record, fetch_bills, fetch_questions, fetch_current_affairs, delete_record
+import numpy as np
+from database_ops import write_transaction, fetch_metadata, fetch_metadata_table, invalidate_metadata, save_bill_record, save_bill_records, fetch_used_code_suffixes, fetch_bills, fetch_questions, invalidate_record_caches, fetch_current_affairs, delete_record
+
+# --- SQL Statements ---
+SQL_INSERT_METADATA = {
+    'ministries': "INSERT OR IGNORE INTO ministries (code, name) VALUES (?, ?)",
+    'states': "INSERT OR IGNORE INTO states (code, name) VALUES (?, ?)",
+}
+SQL_INSERT_QUESTION = """
+    INSERT INTO questions (
+        question_code, question_title, introduced_by, ministry_code, legislative_body, 
+        state_code, q_type, current_status, pdf_path, introduced_date
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_INSERT_CURRENT_AFFAIR = """
+    INSERT INTO current_affairs (title, description, url, pdf_path, published_date)
+    VALUES (?, ?, ?, ?, ?)
+"""
+SQL_UPDATE_BILL_STATUS = "UPDATE bills SET current_status = ?, approval_result = ? WHERE id = ?"
+SQL_UPDATE_QUESTION_STATUS = "UPDATE questions SET current_status = ? WHERE id = ?"
+SQL_DELETE_RECORD = {
+    'bills': "DELETE FROM bills WHERE id = ?",
+    'questions': "DELETE FROM questions WHERE id = ?",
+}
 
 # ==============================================================================
 # 1. METADATA MANAGEMENT (C & R)
 # ==============================================================================
 
+def parse_metadata_csv(csv_text):
+    """Parses pasted 'code,name' lines into (CODE, name) tuples, skipping blank or malformed lines."""
+    rows = []
+    for line in csv_text.splitlines():
+        parts = [part.strip() for part in line.split(',', 1)]
+        if len(parts) == 2 and parts[0] and parts[1] and len(parts[0]) <= 2:
+            rows.append((parts[0].upper(), parts[1]))
+    return rows
+
+def render_bulk_metadata_form(table_name, label):
+    """Renders a CSV-paste form that inserts many Ministries/States in a single transaction."""
+    with st.form(f"bulk_add_{table_name}_form", clear_on_submit=True):
+        csv_text = st.text_area(f"Bulk Add {label}: paste CSV as code,name per line", placeholder="MN,Ministry of Finance\nHA,Ministry of Home Affairs")
+        
+        submitted = st.form_submit_button(f"Add All {label}")
+        if submitted:
+            rows = parse_metadata_csv(csv_text)
+            if not rows:
+                st.error("No valid 'code,name' lines found (codes are at most 2 letters).")
+                return
+            
+            # One executemany in one transaction; duplicates are skipped rather than aborting the batch
+            with write_transaction() as conn:
+                cursor = conn.executemany(SQL_INSERT_METADATA[table_name], rows)
+            invalidate_metadata()
+            st.success(f"Added {cursor.rowcount} of {len(rows)} {label}. {len(rows) - cursor.rowcount} duplicate(s) skipped.")
+
 def render_manage_metadata():
     """Renders the UI for managing Ministries and States (Metadata)."""
     st.header("⚙️ Manage Metadata")
@@ -26,24 +80,21 @@ def render_manage_metadata():
             submitted = st.form_submit_button("Add Ministry")
             if submitted:
                 if m_code and m_name:
-                    try:
-                        conn = get_db_connection()
-                        conn.execute("INSERT INTO ministries (code, name) VALUES (?, ?)", (m_code.upper(), m_name))
-                        conn.commit()
-                        st.success(f"Ministry '{m_name}' ({m_code.upper()}) added successfully!")
-                        st.rerun()
-                    except sqlite3.IntegrityError:
+                    with write_transaction() as conn:
+                        cursor = conn.execute(SQL_INSERT_METADATA['ministries'], (m_code.upper(), m_name))
+                    if cursor.rowcount == 0:
                         st.error("Error: Ministry Code or Name already exists.")
-                    finally:
-                        conn.close()
+                    else:
+                        invalidate_metadata()
+                        st.success(f"Ministry '{m_name}' ({m_code.upper()}) added successfully!")
                 else:
                     st.error("Please enter both Code and Name.")
         
+        render_bulk_metadata_form('ministries', 'Ministries')
+        
         st.markdown("---")
         st.subheader("Existing Ministries")
-        conn = get_db_connection()
-        df_ministries = pd.read_sql_query("SELECT code, name FROM ministries ORDER BY code", conn)
-        conn.close()
+        df_ministries = fetch_metadata_table('ministries')
         st.dataframe(df_ministries, use_container_width=True)
 
     # --- State Management Tab
@@ -56,24 +107,21 @@ def render_manage_metadata():
             submitted = st.form_submit_button("Add State")
             if submitted:
                 if s_code and s_name:
-                    try:
-                        conn = get_db_connection()
-                        conn.execute("INSERT INTO states (code, name) VALUES (?, ?)", (s_code.upper(), s_name))
-                        conn.commit()
-                        st.success(f"State '{s_name}' ({s_code.upper()}) added successfully!")
-                        st.rerun()
-                    except sqlite3.IntegrityError:
+                    with write_transaction() as conn:
+                        cursor = conn.execute(SQL_INSERT_METADATA['states'], (s_code.upper(), s_name))
+                    if cursor.rowcount == 0:
                         st.error("Error: State Code or Name already exists.")
-                    finally:
-                        conn.close()
+                    else:
+                        invalidate_metadata()
+                        st.success(f"State '{s_name}' ({s_code.upper()}) added successfully!")
                 else:
                     st.error("Please enter both Code and Name.")
 
+        render_bulk_metadata_form('states', 'States')
+
         st.markdown("---")
         st.subheader("Existing States")
-        conn = get_db_connection()
-        df_states = pd.read_sql_query("SELECT code, name FROM states ORDER BY code", conn)
-        conn.close()
+        df_states = fetch_metadata_table('states')
         st.dataframe(df_states, use_container_width=True)
 
 
@@ -161,8 +209,10 @@ def render_bill_form(legislative_body):
                 pdf_filename = f"{bill_code}_bill.pdf"
                 pdf_path = os.path.join('pdfs', pdf_filename)
                 try:
+                    # Stream the upload to disk in 1MB chunks instead of materializing a second in-memory copy
+                    bill_pdf.seek(0)
                     with open(pdf_path, "wb") as f:
-                        f.write(bill_pdf.getbuffer())
+                        shutil.copyfileobj(bill_pdf, f, length=1024 * 1024)
                 except Exception as e:
                     st.error(f"Error saving PDF file: {e}")
                     return
@@ -175,6 +225,80 @@ def render_bill_form(legislative_body):
             save_bill_record(bill_data)
 
 
+def parse_bill_csv(csv_text, legislative_body, ministry_codes, state_codes):
+    """
+    Parses pasted 'bill_name,introduced_by,ministry_code,YYYY-MM-DD[,state_code]' lines into SQL_INSERT_BILL tuples.
+    Returns (rows, skipped_line_count, exhausted_prefixes): bad lines are skipped, prefixes with no free code left out.
+    """
+    is_state_assembly = legislative_body == 'State Assembly'
+    approval_status = "Governor Approval" if is_state_assembly else "President Approval"
+    expected_fields = 5 if is_state_assembly else 4
+
+    parsed, skipped = [], 0
+    for fields in csv.reader(line for line in csv_text.splitlines() if line.strip()):
+        fields = [field.strip() for field in fields]
+        if len(fields) != expected_fields or not fields[0]:
+            skipped += 1
+            continue
+        bill_name, introduced_by, ministry_code, introduced_date = fields[:4]
+        ministry_code = ministry_code.upper()
+        state_code = fields[4].upper() if is_state_assembly else None
+        if ministry_code not in ministry_codes or (is_state_assembly and state_code not in state_codes):
+            skipped += 1
+            continue
+        try:
+            # Stored zero-padded like render_bill_form's dates, so '2025-3-1' still sorts as a TEXT date
+            introduced_date = datetime.strptime(introduced_date, '%Y-%m-%d').strftime('%Y-%m-%d')
+        except ValueError:
+            skipped += 1
+            continue
+        prefix = f"{state_code}-{ministry_code}-" if is_state_assembly else f"BL-{ministry_code}-"
+        parsed.append((prefix, bill_name, introduced_by, ministry_code, state_code, introduced_date))
+
+    # Random suffixes drawn only from those still free for each prefix, in the database and within the batch
+    free_suffixes, exhausted_prefixes = {}, set()
+    for prefix, count in Counter(record[0] for record in parsed).items():
+        available = sorted(set(range(1000, 10000)) - fetch_used_code_suffixes('bills', prefix))
+        if count > len(available):
+            exhausted_prefixes.add(prefix)
+        else:
+            free_suffixes[prefix] = random.sample(available, count)
+
+    rows = []
+    for prefix, bill_name, introduced_by, ministry_code, state_code, introduced_date in parsed:
+        if prefix in exhausted_prefixes:
+            continue
+        rows.append((
+            f"{prefix}{free_suffixes[prefix].pop()}", bill_name, introduced_by, ministry_code, legislative_body,
+            state_code, 0, 0, 'Pending', approval_status,
+            'Pending', False, None, introduced_date
+        ))
+    return rows, skipped, exhausted_prefixes
+
+def render_bulk_bill_form(legislative_body):
+    """Renders a CSV-paste form that creates many bills of one body through a single save_bill_records call."""
+    is_state_assembly = legislative_body == 'State Assembly'
+    columns = "bill_name,introduced_by,ministry_code,YYYY-MM-DD" + (",state_code" if is_state_assembly else "")
+    placeholder = "Finance Bill 2025,Nirmala Sitharaman,MN,2025-02-01" + (",MH" if is_state_assembly else "")
+
+    with st.form(f"{legislative_body}_bulk_bill_form", clear_on_submit=True):
+        csv_text = st.text_area(f"Bulk Add {legislative_body} Bills: paste CSV as {columns} per line", placeholder=placeholder)
+
+        submitted = st.form_submit_button(f"Add All {legislative_body} Bills")
+        if submitted:
+            ministry_codes = set(fetch_metadata('ministries').values())
+            state_codes = set(fetch_metadata('states').values())
+            rows, skipped, exhausted_prefixes = parse_bill_csv(csv_text, legislative_body, ministry_codes, state_codes)
+            if exhausted_prefixes:
+                st.error(f"Not enough unused bill codes left for {', '.join(sorted(p + 'NNNN' for p in exhausted_prefixes))}; those lines were not added.")
+            elif not rows:
+                st.error(f"No valid '{columns}' lines found (codes must exist under Manage Metadata).")
+            if not rows:
+                return
+            if skipped:
+                st.warning(f"{skipped} invalid line(s) skipped.")
+            save_bill_records(rows)
+
 def render_question_form(legislative_body):
     """Renders the form for creating a new Question (Reusable for all bodies)."""
     
@@ -234,30 +358,23 @@ def render_question_form(legislative_body):
                 pdf_filename = f"{question_code}_qn.pdf"
                 pdf_path = os.path.join('pdfs', pdf_filename)
                 try:
+                    question_pdf.seek(0)
                     with open(pdf_path, "wb") as f:
-                        f.write(question_pdf.getbuffer())
+                        shutil.copyfileobj(question_pdf, f, length=1024 * 1024)
                 except Exception as e:
                     st.error(f"Error saving PDF file: {e}")
                     return
 
             try:
-                conn = get_db_connection()
-                conn.execute("""
-                    INSERT INTO questions (
+                with write_transaction() as conn:
+                    conn.execute(SQL_INSERT_QUESTION, (
                         question_code, question_title, introduced_by, ministry_code, legislative_body, 
-                        state_code, q_type, current_status, pdf_path, introduced_date
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    question_code, question_title, introduced_by, ministry_code, legislative_body, 
-                    state_code, q_type, current_status, pdf_path, introduced_date.strftime('%Y-%m-%d')
-                ))
-                conn.commit()
+                        state_code, q_type, current_status, pdf_path, introduced_date.strftime('%Y-%m-%d')
+                    ))
+                invalidate_record_caches('questions')
                 st.success(f"{legislative_body} Question '{question_title}' created successfully! Code: **{question_code}**")
-                st.rerun() # Force a rerun to clear form fields better
             except sqlite3.Error as e:
                 st.error(f"Database Error: Could not save question. Details: {e}") 
-            finally:
-                conn.close()
 
 
 # ==============================================================================
@@ -275,29 +392,34 @@ def render_update_delete_ui(df, body_type, is_bill):
     table_name = 'bills' if is_bill else 'questions'
     code_col = 'bill_code' if is_bill else 'question_code'
     
-    df_display = df.copy()
+    # Built once per render so a selection is an O(1) dict lookup instead of a full-column mask.
+    # Records are plain dicts of native Python values holding only the fields the actions below read.
+    record_cols = ['id', 'current_status', 'approval_status', 'approval_result'] if is_bill else ['id', 'current_status']
+    records_by_code = df.set_index(code_col)[record_cols].to_dict('index')
     
-    # ... (code for displaying the table remains the same) ...
+    # Only the displayed columns are copied; the full DataFrame is never duplicated
+    cols_to_show = [code_col, 'bill_name' if is_bill else 'question_title', 'ministry_name', 'current_status', 'introduced_date']
+    df_display = df[cols_to_show]
     
-    if 'state_name' in df_display.columns:
-        df_display['Legislature'] = df_display['state_name'].fillna(body_type)
-        cols_to_show = [code_col, 'bill_name' if is_bill else 'question_title', 'ministry_name', 'Legislature', 'current_status', 'introduced_date']
-    else:
-        cols_to_show = [code_col, 'bill_name' if is_bill else 'question_title', 'ministry_name', 'current_status', 'introduced_date']
+    if 'state_name' in df.columns:
+        # Single vectorized pass over the raw column values (state name, or the body for Lok/Rajya Sabha)
+        state_names = df['state_name'].to_numpy()
+        df_display.insert(3, 'Legislature', np.where(pd.isna(state_names), body_type, state_names))
         
-    st.dataframe(df_display[cols_to_show], use_container_width=True, hide_index=True)
+    st.dataframe(df_display, use_container_width=True, hide_index=True)
     
     st.markdown("---")
     
-    record_codes = df_display[code_col].tolist()
+    # Codes straight from records_by_code (same newest-first rows), as a tuple the selectbox takes as-is
+    record_codes = tuple(records_by_code)
     
-    selected_code = st.selectbox(f"Select {body_type.split()[0]} Code to Edit/Delete:", ['-- Select Code --'] + record_codes, key=f"select_{body_type}_{table_name}_ud")
+    selected_code = st.selectbox(f"Select {body_type.split()[0]} Code to Edit/Delete:", record_codes, index=None, placeholder='-- Select Code --', key=f"select_{body_type}_{table_name}_ud")
     
-    if selected_code != '-- Select Code --':
-        record = df[df[code_col] == selected_code].iloc[0]
+    if selected_code is not None and selected_code in records_by_code:
+        record = records_by_code[selected_code]
         
         # --- CRITICAL DEBUG CHECK ---
-        record_id = int(record['id']) if record['id'] is not None else None 
+        record_id = record['id']
         st.warning(f"DEBUG: Selected Record ID (must be integer > 0): {record_id}")
         
         if record_id is None:
@@ -313,16 +435,14 @@ def render_update_delete_ui(df, body_type, is_bill):
             if st.button(f"🔴 Permanently Delete {selected_code}", use_container_width=True, key=f"delete_{selected_code}"):
                 
                 # We are moving the delete logic inside the try/except for better isolation
-                conn = get_db_connection()
                 try:
-                    conn.execute(f"DELETE FROM {table_name} WHERE id = ?", (record_id,))
-                    conn.commit()
+                    with write_transaction() as conn:
+                        conn.execute(SQL_DELETE_RECORD[table_name], (record_id,))
+                    invalidate_record_caches(table_name)
                     st.success(f"Record {selected_code} deleted successfully from {table_name}! Refreshing...")
                     st.rerun() 
                 except sqlite3.Error as e:
                     st.error(f"Error executing DELETE SQL: {e}")
-                finally:
-                    conn.close()
         
         # --- UPDATE FORM ---
         with col_u:
@@ -353,22 +473,20 @@ def render_update_delete_ui(df, body_type, is_bill):
                 update_submitted = st.form_submit_button("Update Record Status")
                 
                 if update_submitted:
-                    conn = get_db_connection()
                     try:
-                        if is_bill:
-                            conn.execute("UPDATE bills SET current_status = ?, approval_result = ? WHERE id = ?", 
-                                        (new_status, new_approval, record_id)) # Use validated record_id
-                        else: 
-                            conn.execute("UPDATE questions SET current_status = ? WHERE id = ?", 
-                                        (new_status, record_id)) # Use validated record_id
+                        with write_transaction() as conn:
+                            if is_bill:
+                                conn.execute(SQL_UPDATE_BILL_STATUS, 
+                                            (new_status, new_approval, record_id)) # Use validated record_id
+                            else: 
+                                conn.execute(SQL_UPDATE_QUESTION_STATUS, 
+                                            (new_status, record_id)) # Use validated record_id
                         
-                        conn.commit()
+                        invalidate_record_caches(table_name)
                         st.success(f"Record {selected_code} updated successfully! Refreshing...")
                         st.rerun() 
                     except sqlite3.Error as e:
                         st.error(f"Error executing UPDATE SQL: {e}")
-                    finally:
-                        conn.close()
 
 # ==============================================================================
 # 4. CURRENT AFFAIRS MANAGEMENT (C & D)
@@ -404,25 +522,20 @@ def render_current_affairs_form():
                 pdf_filename = f"CA_{title.replace(' ', '_')}_{random.randint(100, 999)}.pdf"
                 pdf_path = os.path.join('pdfs', pdf_filename)
                 try:
+                    pdf.seek(0)
                     with open(pdf_path, "wb") as f:
-                        f.write(pdf.getbuffer())
+                        shutil.copyfileobj(pdf, f, length=1024 * 1024)
                 except Exception as e:
                     st.error(f"Error saving PDF file: {e}")
                     return
             
             try:
-                conn = get_db_connection()
-                conn.execute("""
-                    INSERT INTO current_affairs (title, description, url, pdf_path, published_date)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (title, description, url, pdf_path, published_date.strftime('%Y-%m-%d')))
-                conn.commit()
+                with write_transaction() as conn:
+                    conn.execute(SQL_INSERT_CURRENT_AFFAIR, (title, description, url, pdf_path, published_date.strftime('%Y-%m-%d')))
+                fetch_current_affairs.clear()
                 st.success(f"Current Affair '{title}' published successfully.")
-                st.rerun() # Rerun on success
             except sqlite3.Error as e:
                 st.error(f"Database Error: Could not save Current Affair. Details: {e}") 
-            finally:
-                conn.close()
 
 def render_manage_ca():
     """Renders the Admin UI for managing Current Affairs."""
@@ -437,9 +550,11 @@ def render_manage_ca():
         st.dataframe(df_ca[['published_date', 'title', 'url', 'pdf_path']], use_container_width=True)
         
         ca_titles = df_ca['title'].tolist()
+        # Titles are not unique; keep the first (newest) match like the previous boolean-mask lookup
+        records_by_title = df_ca.drop_duplicates('title').set_index('title', drop=False).to_dict('index')
         selected_title = st.selectbox("Select CA to Delete", ['-- Select Title --'] + ca_titles)
         if selected_title != '-- Select Title --':
-            record = df_ca[df_ca['title'] == selected_title].iloc[0]
+            record = records_by_title[selected_title]
             if st.button(f"🔴 Delete '{selected_title}'", key='delete_ca_btn'):
                 delete_record('current_affairs', record['id'], selected_title) 
                 st.rerun() # Rerun on delete
@@ -467,6 +582,8 @@ def render_manage_data():
         st.subheader("Select Legislative Body for New Bill")
         body = st.selectbox("Body Type", ['Lok Sabha', 'Rajya Sabha', 'State Assembly'], key='bill_create_body')
         render_bill_form(body) 
+        st.markdown("---")
+        render_bulk_bill_form(body)
 
         
     # --- CREATE QUESTIONS ---
@@ -1,5 +1,6 @@
 import streamlit as st
 import os # CRITICAL: Needed to access environment variables (Secrets)
+import hashlib
 from pypdf import PdfReader
 from google import genai
 from google.genai import types 
@@ -12,20 +13,73 @@ GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 # 2. Define the exact placeholder used in the code as a fallback check.
 FALLBACK_KEY = "YOUR_GEMINI_API_KEY_HERE"
 
+# ~15k tokens of input: plenty for a 100-word summary, and caps per-click latency and cost on long bills.
+MAX_SUMMARY_INPUT_CHARS = 60000
+
 # -------------------------------------------------------------------------
 
+# In memory only: Streamlit ignores ttl for persist="disk" and never deletes evicted disk entries, so every
+# re-uploaded PDF (new mtime) would leave its full-text pickle behind.
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def read_pdf_text(pdf_path, mtime):
+    """
+    Parses the text of every page in the PDF.
+    Cached per (pdf_path, mtime): re-summarizing an unchanged file skips parsing, a replaced file is re-read.
+    """
+    # Sequential on purpose: pypdf is pure Python, so extract_text() holds the GIL and a thread pool
+    # would not overlap any of the work; one PdfReader is also not safe to share across threads.
+    reader = PdfReader(pdf_path)
+    parts = [page.extract_text() or "" for page in reader.pages]
+    return "".join(parts)
+
 def extract_text_from_pdf(pdf_path):
     """Extracts text content from a local PDF file."""
-    text = ""
     try:
-        reader = PdfReader(pdf_path)
-        for page in reader.pages:
-            text += page.extract_text() or ""
-        return text
+        return read_pdf_text(pdf_path, os.path.getmtime(pdf_path))
     except Exception as e:
         st.error(f"Error reading PDF: {e}")
         return None
 
+def truncate_for_summary(text, limit=MAX_SUMMARY_INPUT_CHARS):
+    """Keeps long documents within the input budget, preserving the opening (objects) and closing sections."""
+    if len(text) <= limit:
+        return text
+    head = limit * 3 // 4
+    return f"{text[:head]}\n\n[...]\n\n{text[-(limit - head):]}"
+
+@st.cache_resource(show_spinner=False)
+def get_genai_client():
+    """Returns one shared Gemini client so its HTTP connection pool (and TLS session) is reused across summaries."""
+    # The client uses the key pulled from os.environ, which holds the actual secret value.
+    return genai.Client(api_key=GEMINI_API_KEY)
+
+# Persisted so a document is sent to the model once per deployment; max_entries bounds the in-memory layer.
+# On disk there is one small entry per distinct document text (identical re-uploads reuse it).
+@st.cache_data(persist="disk", max_entries=256, show_spinner=False)
+def generate_summary(text_digest, _bill_text):
+    """
+    Asks Gemini for the summary text.
+    Cached by the SHA-256 digest of the text only (Streamlit skips hashing the underscore argument).
+    """
+    client = get_genai_client()
+    
+    system_prompt = (
+        "You are a legislative analyst. Summarize the provided text of an Indian Bill or Question. "
+        "Provide a concise summary (max 100 words) covering the document's key objectives, "
+        "main provisions, and intended impact. Use clear, formal language."
+    )
+    
+    user_prompt = f"Please summarize the following text:\n\n---\n\n{_bill_text}"
+    
+    response = client.models.generate_content(
+        model='gemini-2.5-flash',
+        contents=[user_prompt],
+        config=types.GenerateContentConfig(
+            system_instruction=system_prompt
+        )
+    )
+    return response.text
+
 def get_ai_summary(pdf_path):
     """Connects to the Gemini API to summarize the text extracted from the PDF."""
     if not pdf_path or not os.path.exists(pdf_path):
@@ -45,27 +99,12 @@ def get_ai_summary(pdf_path):
                  st.info("Action: Go to Streamlit Cloud -> Manage App -> Secrets. Ensure GEMINI_API_KEY is set correctly.")
                  return
             
-            # The client uses the key pulled from os.environ, which holds the actual secret value.
-            client = genai.Client(api_key=GEMINI_API_KEY)
-            
-            system_prompt = (
-                "You are a legislative analyst. Summarize the provided text of an Indian Bill or Question. "
-                "Provide a concise summary (max 100 words) covering the document's key objectives, "
-                "main provisions, and intended impact. Use clear, formal language."
-            )
-            
-            user_prompt = f"Please summarize the following text:\n\n---\n\n{bill_text}"
-            
-            response = client.models.generate_content(
-                model='gemini-2.5-flash',
-                contents=[user_prompt],
-                config=types.GenerateContentConfig(
-                    system_instruction=system_prompt
-                )
-            )
+            bill_text = truncate_for_summary(bill_text)
+            text_digest = hashlib.sha256(bill_text.encode("utf-8")).hexdigest()
+            summary = generate_summary(text_digest, bill_text)
 
             st.markdown("### 🌟 AI Summary")
-            st.info(response.text)
+            st.info(summary)
             st.success("Analysis Complete.")
 
         except APIError as e:
@@ -1,29 +1,111 @@
 import sqlite3
+import os
+import re
+import queue
+import functools
+import threading
+from contextlib import contextmanager
 import pandas as pd
 import streamlit as st # Used for error messages and success/fail banners
+from schema_ops import LEGISLATIVE_BODIES, SEARCH_COLUMNS, create_record_indexes, ensure_search_index, fts5_available
 
 # --- Configuration ---
 DB_FILE = 'legisq.db'
 
 # --- Database Connection ---
+@st.cache_resource(show_spinner=False)
 def get_db_connection():
-    """Returns a connection object to the SQLite database."""
-    conn = sqlite3.connect(DB_FILE)
+    """Returns the shared SQLite connection, cached for the server's lifetime (callers must NOT close it)."""
+    # isolation_level=None: reads never leave an implicit transaction open; writes go through write_transaction()
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False, isolation_level=None)
     conn.row_factory = sqlite3.Row 
+    conn.execute("PRAGMA journal_mode=WAL")
+    # fewer fsyncs per commit (safe under WAL), in-memory temp tables, ~64MB page cache
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-64000")
     return conn
 
-# --- Database Connection ---
-def get_db_connection():
-    # ... (existing connection logic) ...
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row 
-    return conn
+# Streamlit runs every session's script in its own thread, all sharing the connection above.
+_write_lock = threading.Lock()
 
-# --- ADD THIS NEW FUNCTION ---
-def ensure_schema_is_initialized():
-    """Checks and creates all necessary tables if they do not exist."""
+@contextmanager
+def write_transaction():
+    """Yields the shared connection inside one BEGIN IMMEDIATE ... COMMIT (rolled back on error), one writer at a time."""
     conn = get_db_connection()
+    with _write_lock:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            # Inside the try: a failed COMMIT (e.g. SQLITE_BUSY, disk full) must not leave the transaction open
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+# --- Read Connection Pool ---
+# Viewer sessions read through their own read-only connections, so under WAL they
+# run in parallel with each other and with the single writer above.
+READ_POOL_SIZE = min(8, os.cpu_count() or 1)
+
+class SQLitePool:
+    """Fixed-size pool of read-only SQLite connections shared by all Streamlit sessions."""
+
+    def __init__(self, db_file, size):
+        self._connections = queue.Queue(maxsize=size)
+        for _ in range(size):
+            conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA cache_size=-16000")
+            self._connections.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrows a connection for the duration of the block, waiting if every connection is in use."""
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+@st.cache_resource(show_spinner=False)
+def get_read_pool():
+    """Returns the process-wide read pool (created lazily, after the schema exists)."""
+    return SQLitePool(DB_FILE, READ_POOL_SIZE)
+
+def read_conn():
+    """Usage: `with read_conn() as conn:` - a pooled read-only connection for SELECTs."""
+    return get_read_pool().connection()
+
+def read_frame(conn, query, params=()):
+    """Runs query on conn and builds the DataFrame straight from the cursor's tuples."""
     cursor = conn.cursor()
+    cursor.row_factory = None  # plain tuples for from_records
+    cursor.execute(query, params)
+    return pd.DataFrame.from_records(cursor.fetchall(), columns=[col[0] for col in cursor.description])
+
+# --- ADD THIS NEW FUNCTION ---
+@st.cache_resource(show_spinner=False)
+def ensure_schema_is_initialized():
+    """Checks and creates all necessary tables if they do not exist (once per server process)."""
+    # All schema DDL runs as one write transaction, so it never races a concurrent writer
+    with write_transaction() as conn:
+        _create_tables_and_indexes(conn.cursor())
+
+    # --- 7. Full-Text Search Indexes (skipped on SQLite builds without FTS5) ---
+    # Only take the write lock when an index is actually missing (i.e. first start or upgrade).
+    if has_fts5():
+        with read_conn() as conn:
+            existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        missing = [table_name for table_name in SEARCH_COLUMNS if f"{table_name}_fts" not in existing]
+        if missing:
+            with write_transaction() as conn:
+                for table_name in missing:
+                    ensure_search_index(conn, table_name)
+
+def _create_tables_and_indexes(cursor):
+    """Sections 1-6 of the schema: CREATE ... IF NOT EXISTS for every table and index."""
 
     # --- 1. Ministries Table ---
     cursor.execute("""
@@ -93,187 +175,262 @@ def ensure_schema_is_initialized():
         )
     """)
 
-    conn.commit()
-    conn.close()
+    # --- 6. Indexes ---
+    create_record_indexes(cursor)
 # --- END NEW FUNCTION ---
+
+# --- Full-Text Search (FTS5) ---
+# SEARCH_COLUMNS and the <table>_fts DDL live in schema_ops, shared with setup_schema.py.
+@st.cache_resource(show_spinner=False)
+def has_fts5():
+    """schema_ops.fts5_available(), probed once per server process."""
+    return fts5_available()
+
+def fts_match_query(search_term):
+    """Turns free text into quoted FTS5 prefix terms: 'BL-MN 84' -> '"bl"* "mn"* "84"*' ("" if no words)."""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", search_term.lower()))
+
+def search_filter(table_name, search_term):
+    """Returns (sql_fragment, param) restricting `t` to search_term, or (None, None) when there is nothing to search."""
+    if has_fts5():
+        match_query = fts_match_query(search_term or "")
+        if not match_query:
+            return None, None
+        return f"t.id IN (SELECT rowid FROM {table_name}_fts WHERE {table_name}_fts MATCH ?)", match_query
+
+    search_term = (search_term or "").strip().lower()
+    if not search_term:
+        return None, None
+    code_col, name_col = SEARCH_COLUMNS[table_name]
+    return f"instr(lower(t.{code_col} || char(1) || t.{name_col} || char(1) || m.name), ?) > 0", search_term
 # --- Metadata Fetchers ---
+# Ministries/States are near-static and only change through Manage Metadata,
+# which calls invalidate_metadata() after a write.
+@st.cache_data(ttl=3600, show_spinner=False)
 def fetch_metadata(table_name):
     """Fetches all records from a given metadata table (ministries/states)."""
-    conn = get_db_connection()
-    df = pd.read_sql_query(f"SELECT code, name FROM {table_name} ORDER BY name", conn)
-    conn.close()
-    return {row['name']: row['code'] for index, row in df.iterrows()}
+    with read_conn() as conn:
+        rows = conn.execute(f"SELECT code, name FROM {table_name} ORDER BY name").fetchall()
+    return {row['name']: row['code'] for row in rows}
 
-# --- Fetch Bills ---
-def fetch_bills(legislative_body, search_term=""):
-    """
-    Fetches bills for a specific legislative body, filtered by search_term.
-    Uses b.* to ensure the 'id' column is included for CRUD operations.
-    """
-    conn = get_db_connection()
-    
-    query = """
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_metadata_table(table_name):
+    """Fetches a metadata table (ministries/states) ordered by code, as a list of {'code', 'name'} dicts."""
+    with read_conn() as conn:
+        rows = conn.execute(f"SELECT code, name FROM {table_name} ORDER BY code").fetchall()
+    return [dict(row) for row in rows]
+
+def invalidate_metadata():
+    """Clears the cached ministries/states lookups; call after adding or removing one."""
+    fetch_metadata.clear()
+    fetch_metadata_table.clear()
+
+# Queries inline the known LEGISLATIVE_BODIES (schema_ops) as SQL literals (never user text) so SQLite can match
+# the per-body partial indexes, which it cannot do for a bound `legislative_body = ?`.
+def body_filter(legislative_body):
+    """Returns (sql_fragment, params) filtering `t` on legislative_body: a literal for known bodies, else a bound parameter."""
+    if legislative_body in LEGISLATIVE_BODIES:
+        return f"t.legislative_body = '{legislative_body}'", []
+    return "t.legislative_body = ?", [legislative_body]
+
+# --- Sorting & Keyset Pagination ---
+# Viewer sort options per table, as ordered (SQL expression, direction) keys. Every order ends in the
+# unique id so the last row's key values form an exact keyset cursor for the next page.
+# Nullable columns sort through COALESCE(col, ''), so cursors never hold NULL (which no comparison can get past);
+# '' sorts below every value, which keeps undated rows last under DESC as before.
+SORT_DATE = "COALESCE(t.introduced_date, '')"
+SORT_KEYS = {
+    'bills': {
+        'date': [(SORT_DATE, "DESC"), ("t.id", "DESC")],
+        'status': [("CASE t.current_status WHEN 'Passed' THEN 0 WHEN 'Pending' THEN 1 ELSE 2 END", "ASC"),
+                   (SORT_DATE, "DESC"), ("t.id", "DESC")],
+        'name': [("t.bill_name COLLATE NOCASE", "ASC"), ("t.id", "ASC")],
+    },
+    'questions': {
+        'date': [(SORT_DATE, "DESC"), ("t.id", "DESC")],
+        'status': [("CASE t.current_status WHEN 'Not Answered' THEN 0 WHEN 'Answered' THEN 1 ELSE 2 END", "ASC"),
+                   (SORT_DATE, "DESC"), ("t.id", "DESC")],
+        'type': [("COALESCE(t.q_type, '')", "ASC"), (SORT_DATE, "DESC"), ("t.id", "DESC")],
+    },
+}
+
+# Columns the viewers and admin screens actually read; only these are selected instead of t.*.
+RECORD_COLUMNS = {
+    'bills': ('id', 'bill_code', 'bill_name', 'introduced_by', 'legislative_body', 'current_status',
+              'approval_status', 'approval_result', 'votes_favour', 'votes_against', 'pdf_path', 'introduced_date'),
+    'questions': ('id', 'question_code', 'question_title', 'introduced_by', 'legislative_body', 'q_type',
+                  'current_status', 'pdf_path', 'introduced_date'),
+}
+
+def sort_key_columns(sort_keys):
+    """Names of the sort_k<i> columns fetch_bills/fetch_questions select for each sort key (the page cursor)."""
+    return [f"sort_k{i}" for i in range(len(sort_keys))]
+
+def keyset_predicate(sort_keys, after):
+    """Builds the WHERE fragment (and params) for rows sorting strictly after the cursor values in `after`."""
+    leading_expr, leading_direction = sort_keys[0]
+    clauses, params = [], [after[0]]
+    for i, (expr, direction) in enumerate(sort_keys):
+        terms = [f"{prev_expr} = ?" for prev_expr, _ in sort_keys[:i]]
+        terms.append(f"{expr} {'<' if direction == 'DESC' else '>'} ?")
+        clauses.append("(" + " AND ".join(terms) + ")")
+        params.extend(after[:i + 1])
+    # (k0 past v0) OR (k0 = v0 AND k1 past v1) OR ..., plus a redundant bound on k0 that lets SQLite seek the index
+    bound = f"{leading_expr} {'<=' if leading_direction == 'DESC' else '>='} ?"
+    return f"{bound} AND (" + " OR ".join(clauses) + ")", params
+
+# Built once per query shape, so repeat calls send identical SQL text and sqlite3 reuses the prepared statement.
+@functools.lru_cache(maxsize=None)
+def build_records_query(table_name, body_sql, sort_by, search_sql, with_cursor, paged):
+    """SQL text for one shape of fetch_bills/fetch_questions query."""
+    sort_keys = SORT_KEYS[table_name][sort_by]
+    sort_select = ", ".join(f"{expr} AS {col}" for (expr, _), col in zip(sort_keys, sort_key_columns(sort_keys)))
+    record_select = ", ".join(f"t.{col}" for col in RECORD_COLUMNS[table_name])
+    query = f"""
         SELECT 
-            b.*, 
+            {record_select}, 
             m.name AS ministry_name, 
-            s.name AS state_name 
-        FROM bills b
-        JOIN ministries m ON b.ministry_code = m.code 
-        LEFT JOIN states s ON b.state_code = s.code 
-        WHERE b.legislative_body = ?
+            s.name AS state_name,
+            {sort_select}
+        FROM {table_name} t
+        JOIN ministries m ON t.ministry_code = m.code 
+        LEFT JOIN states s ON t.state_code = s.code 
+        WHERE {body_sql}
     """
-    
-    params = [legislative_body]
-    
-    if search_term:
-        search_like = f"%{search_term.lower()}%"
-        query += """
-            AND (
-                LOWER(b.bill_code) LIKE ? OR 
-                LOWER(b.bill_name) LIKE ? OR 
-                LOWER(m.name) LIKE ?
-            )
-        """
-        params.extend([search_like, search_like, search_like])
-        
-    query += " ORDER BY b.introduced_date DESC"
+    if search_sql:
+        query += f" AND {search_sql}"
+    if with_cursor:
+        predicate, _ = keyset_predicate(sort_keys, [None] * len(sort_keys))
+        query += f" AND {predicate}"
+    query += " ORDER BY " + ", ".join(f"{expr} {direction}" for expr, direction in sort_keys)
+    if paged:
+        query += " LIMIT ?"
+    return query
+
+def fetch_records_page(table_name, legislative_body, search_term, sort_by, page_size, after):
+    """Shared query for fetch_bills/fetch_questions; with page_size set, returns one keyset page after the `after` cursor."""
+    search_sql, search_param = search_filter(table_name, search_term)
+    body_sql, params = body_filter(legislative_body)
+    query = build_records_query(table_name, body_sql, sort_by, search_sql, after is not None, page_size is not None)
+
+    if search_sql:
+        params.append(search_param)
+    if after is not None:
+        params.extend(keyset_predicate(SORT_KEYS[table_name][sort_by], after)[1])
+    if page_size is not None:
+        params.append(page_size)
     
     try:
-        df = pd.read_sql_query(query, conn, params=params)
+        with read_conn() as conn:
+            df = read_frame(conn, query, params)
         return df
     except Exception as e:
-        st.error(f"Database Query Failed in fetch_bills. Error: {e}")
+        st.error(f"Database Query Failed in fetch_{table_name}. Error: {e}")
         st.code(query)
         return pd.DataFrame()
-    finally:
-        conn.close()
 
-# --- Fetch Questions ---
-def fetch_questions(legislative_body, search_term=""):
-    """Fetches questions for a specific legislative body, filtered by search_term."""
-    conn = get_db_connection()
-    
-    query = """
-        SELECT 
-            q.*, 
-            m.name AS ministry_name, 
-            s.name AS state_name 
-        FROM questions q
-        JOIN ministries m ON q.ministry_code = m.code 
-        LEFT JOIN states s ON q.state_code = s.code 
-        WHERE q.legislative_body = ?
+# --- Fetch Bills ---
+# Cached per (legislative_body, search_term, sort_by, page); writers call invalidate_record_caches() afterwards.
+@st.cache_data(ttl=120, max_entries=64, show_spinner=False)
+def fetch_bills(legislative_body, search_term="", sort_by="date", page_size=None, after=None):
     """
-    params = [legislative_body]
-    
-    if search_term:
-        search_like = f"%{search_term.lower()}%"
-        query += """
-            AND (
-                LOWER(q.question_code) LIKE ? OR 
-                LOWER(q.question_title) LIKE ? OR 
-                LOWER(m.name) LIKE ?
-            )
-        """
-        params.extend([search_like, search_like, search_like])
-        
-    query += " ORDER BY q.introduced_date DESC"
-    
-    try:
-        df = pd.read_sql_query(query, conn, params=params)
-        return df
-    except Exception as e:
-        st.error(f"Database Query Failed in fetch_questions. Error: {e}")
-        st.code(query)
-        return pd.DataFrame()
-    finally:
-        conn.close()
+    Fetches bills for a specific legislative body, filtered by search_term and sorted by 'date', 'status' or 'name'.
+    With page_size set, returns one keyset page after the `after` cursor (the previous page's last sort_k<i> values).
+    """
+    return fetch_records_page('bills', legislative_body, search_term, sort_by, page_size, after)
+
+# --- Fetch Questions ---
+@st.cache_data(ttl=120, max_entries=64, show_spinner=False)
+def fetch_questions(legislative_body, search_term="", sort_by="date", page_size=None, after=None):
+    """Fetches questions for a specific legislative body, sorted by 'date', 'status' or 'type' (paged like fetch_bills)."""
+    return fetch_records_page('questions', legislative_body, search_term, sort_by, page_size, after)
+
+def fetch_used_code_suffixes(table_name, prefix):
+    """Returns the 4-digit suffixes already taken by '<prefix>NNNN' codes (e.g. 'BL-MN-') in any legislative body."""
+    code_col = 'bill_code' if table_name == 'bills' else 'question_code'
+    # Case-sensitive GLOB on a literal prefix can use the UNIQUE index on the code column
+    with read_conn() as conn:
+        rows = conn.execute(
+            f"SELECT substr({code_col}, ?) FROM {table_name} WHERE {code_col} GLOB ?",
+            (len(prefix) + 1, prefix + '[0-9][0-9][0-9][0-9]')
+        ).fetchall()
+    return {int(row[0]) for row in rows}
+
+def invalidate_record_caches(table_name):
+    """Clears every cached read of a bills/questions table; call after any INSERT/UPDATE/DELETE on it."""
+    if table_name == 'bills':
+        fetch_bills.clear()
+    else:
+        fetch_questions.clear()
 
 # --- Fetch Current Affairs ---
+# Cleared by the Manage Current Affairs publish/delete handlers.
+SQL_FETCH_CURRENT_AFFAIRS = "SELECT id, title, description, url, pdf_path, published_date FROM current_affairs ORDER BY published_date DESC"
+
+@st.cache_data(ttl=120, max_entries=64, show_spinner=False)
 def fetch_current_affairs():
     """Fetches all current affairs records."""
-    conn = get_db_connection()
-    df = pd.read_sql_query("SELECT * FROM current_affairs ORDER BY published_date DESC", conn)
-    conn.close()
+    with read_conn() as conn:
+        df = read_frame(conn, SQL_FETCH_CURRENT_AFFAIRS)
     return df
 
-# --- Fetch Search Suggestions ---
-def fetch_search_suggestions(legislative_body, search_term):
-    """Fetches suggestions for bill/question codes, names, and ministries."""
-    if not search_term or len(search_term) < 2:
+# --- Search Suggestions ---
+def search_suggestions(df, table_name, search_term, limit=10):
+    """Up to `limit` codes, names and ministries from a page of search hits, best matches for search_term first."""
+    if df.empty:
         return []
-    
-    conn = get_db_connection()
-    search_like = f"%{search_term.lower()}%"
-    
-    if 'Bill' in legislative_body: 
-        table = 'bills'
-        code_col = 'bill_code'
-        name_col = 'bill_name'
-    else: 
-        table = 'questions'
-        code_col = 'question_code'
-        name_col = 'question_title'
+    code_col, name_col = SEARCH_COLUMNS[table_name]
+    values = (set(df[code_col]) | set(df[name_col]) | set(df['ministry_name'])) - {None}
+    terms = re.findall(r"\w+", search_term.lower())
 
-    query = f"""
-        SELECT 
-            b.{code_col}, 
-            b.{name_col}, 
-            m.name AS ministry_name 
-        FROM {table} b
-        JOIN ministries m ON b.ministry_code = m.code
-        WHERE b.legislative_body = ?
-        AND (
-            LOWER(b.{code_col}) LIKE ? OR 
-            LOWER(b.{name_col}) LIKE ? OR 
-            LOWER(m.name) LIKE ?
-        )
-        LIMIT 10 
-    """
-    
-    params = [legislative_body, search_like, search_like, search_like]
-    df = pd.read_sql_query(query, conn, params=params)
-    conn.close()
-
-    suggestions = set()
-    for _, row in df.iterrows():
-        suggestions.add(row[code_col])
-        suggestions.add(row[name_col])
-        suggestions.add(row['ministry_name'])
-        
-    return sorted(list(suggestions))
+    def matched_terms(value):
+        words = re.findall(r"\w+", str(value).lower())
+        return sum(any(word.startswith(term) for word in words) for term in terms)
+
+    return sorted(values, key=lambda value: (-matched_terms(value), value))[:limit]
 
 # --- CREATE/DELETE Helpers ---
+SQL_INSERT_BILL = """
+    INSERT INTO bills (
+        bill_code, bill_name, introduced_by, ministry_code, legislative_body, 
+        state_code, votes_favour, votes_against, current_status, approval_status, 
+        approval_result, is_money_bill, pdf_path, introduced_date
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
 def save_bill_record(bill_data):
-    """Reusable function to save any bill type."""
-    conn = get_db_connection()
+    """Saves a single bill tuple; thin wrapper over save_bill_records."""
+    save_bill_records([bill_data])
+
+def save_bill_records(bill_rows):
+    """Reusable function to save any bill type: inserts SQL_INSERT_BILL tuples in one transaction."""
     try:
-        conn.execute("""
-            INSERT INTO bills (
-                bill_code, bill_name, introduced_by, ministry_code, legislative_body, 
-                state_code, votes_favour, votes_against, current_status, approval_status, 
-                approval_result, is_money_bill, pdf_path, introduced_date
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, bill_data)
-        conn.commit()
-        st.success(f"{bill_data[4]} Bill '{bill_data[1]}' created successfully! Code: **{bill_data[0]}**")
+        with write_transaction() as conn:
+            conn.executemany(SQL_INSERT_BILL, bill_rows)
+        invalidate_record_caches('bills')
+        if len(bill_rows) == 1:
+            bill_data = bill_rows[0]
+            st.success(f"{bill_data[4]} Bill '{bill_data[1]}' created successfully! Code: **{bill_data[0]}**")
+        else:
+            st.success(f"{len(bill_rows)} Bills created successfully!")
     except sqlite3.Error as e:
         st.error(f"Database Error: Could not save bill. Details: {e}") 
-    finally:
-        conn.close()
 
 def delete_record(table, record_id, record_code):
     """Handles deletion of a record from tables."""
-    conn = get_db_connection()
     try:
         if record_id is None:
             st.error(f"Error: Could not determine ID for record {record_code}.")
             return
 
-        conn.execute(f"DELETE FROM {table} WHERE id = ?", (record_id,))
-        conn.commit()
+        with write_transaction() as conn:
+            conn.execute(f"DELETE FROM {table} WHERE id = ?", (record_id,))
+        # Drop cached reads right away so the deletion is visible on the rerun
+        if table == 'current_affairs':
+            fetch_current_affairs.clear()
+        else:
+            invalidate_record_caches(table)
         st.success(f"Record {record_code} deleted successfully from {table}. Refreshing...")
     except sqlite3.Error as e:
         st.error(f"Error deleting record: {e}")
-    finally:
-        conn.close()
-        # st.rerun() -- Rerun handled by calling module (Admin Form)
\ No newline at end of file
+    # st.rerun() -- Rerun handled by calling module (Admin Form)
\ No newline at end of file
@@ -1,8 +1,9 @@
 import streamlit as st
 from admin_forms import render_manage_metadata, render_manage_data, render_manage_ca
 from viewers_modules import render_bills_viewer, render_questions_viewer, render_ca_viewer
+import os
 import sqlite3 # Import for database initialization check
-from database_ops import get_db_connection, ensure_schema_is_initialized
+from database_ops import DB_FILE, read_conn, ensure_schema_is_initialized
 
 # --- Configuration & Setup ---
 st.set_page_config(layout="wide", page_title="LegisQ - Legislative Information System")
@@ -15,18 +16,23 @@ ensure_schema_is_initialized()
 st.sidebar.info("Database Schema Checked/Created.") 
 # This helper function is usually run once externally (python database.py),
 # but this check ensures the DB file exists before running queries.
+# Not called at the moment: its router check below is commented out, since ensure_schema_is_initialized() runs first.
 def check_database_exists():
-    try:
-        conn = get_db_connection()
-        # Try to read a table to check if the database structure is initialized
-        conn.execute("SELECT 1 FROM bills LIMIT 1") 
-        conn.close()
-        return True
-    except sqlite3.OperationalError:
-        # If the table doesn't exist, prompt the user to run setup script
-        return False
-    except Exception:
-        return False
+    # Checked once per session: the file must exist and sqlite_master must list the bills table.
+    # Later reruns read the cached flag instead of querying again.
+    if 'db_ok' not in st.session_state:
+        try:
+            if not os.path.exists(DB_FILE):
+                st.session_state['db_ok'] = False
+            else:
+                with read_conn() as conn:
+                    st.session_state['db_ok'] = bool(conn.execute(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'bills'"
+                    ).fetchone())
+        except sqlite3.Error:
+            # If the database can't be read, prompt the user to run setup script
+            st.session_state['db_ok'] = False
+    return st.session_state['db_ok']
 
 
 # --- Admin Login/Logout Logic ---
@@ -0,0 +1,73 @@
+import sqlite3
+
+# Schema pieces shared by the app (database_ops) and the standalone setup_schema.py script.
+# Plain sqlite3 only, so running setup_schema.py does not pull in Streamlit or pandas.
+
+# --- Record Indexes ---
+LEGISLATIVE_BODIES = ('Lok Sabha', 'Rajya Sabha', 'State Assembly')
+
+def create_record_indexes(cursor):
+    """Creates the bills/questions indexes the viewer and admin queries rely on (IF NOT EXISTS)."""
+    # Those queries always filter on one legislative_body and by default sort by introduced_date DESC.
+    # A partial index per body on (COALESCE(introduced_date, '') DESC, id DESC) - the exact SORT_KEYS expression
+    # in database_ops - makes that a pre-sorted walk over only that body's rows, and lets the keyset pagination
+    # cursor seek straight to the next page. SQLite only matches a partial index when the query spells the body
+    # as a literal (see database_ops.body_filter()).
+    # bill_code/question_code are already indexed by their UNIQUE constraints.
+    for table in ('bills', 'questions'):
+        for body in LEGISLATIVE_BODIES:
+            suffix = body.lower().replace(' ', '_')
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_{suffix}_date ON {table}(COALESCE(introduced_date, '') DESC, id DESC) "
+                f"WHERE legislative_body = '{body}'"
+            )
+        # Foreign-key columns used by the ministries/states JOINs.
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_ministry ON {table}(ministry_code)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_state ON {table}(state_code)")
+
+# --- Full-Text Search (FTS5) ---
+# Searchable columns per table. Each table gets a '<table>_fts' FTS5 index over code, name and
+# ministry name, kept in sync by triggers, so search is an inverted-index MATCH instead of LIKE '%x%' scans.
+SEARCH_COLUMNS = {
+    'bills': ('bill_code', 'bill_name'),
+    'questions': ('question_code', 'question_title'),
+}
+
+def fts5_available():
+    """True when the linked SQLite library was built with the FTS5 module."""
+    try:
+        with sqlite3.connect(":memory:") as probe:
+            probe.execute("CREATE VIRTUAL TABLE fts5_probe USING fts5(x)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+def ensure_search_index(conn, table_name):
+    """Creates <table>_fts and its sync triggers if missing, backfilling rows that already exist."""
+    code_col, name_col = SEARCH_COLUMNS[table_name]
+    fts_table = f"{table_name}_fts"
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts_table,)).fetchone():
+        return
+
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE {fts_table} USING fts5(
+            {code_col}, {name_col}, ministry_name,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    """)
+    insert_new = f"""
+        INSERT INTO {fts_table} (rowid, {code_col}, {name_col}, ministry_name)
+        VALUES (new.id, new.{code_col}, new.{name_col}, (SELECT name FROM ministries WHERE code = new.ministry_code));
+    """
+    delete_old = f"DELETE FROM {fts_table} WHERE rowid = old.id;"
+    conn.execute(f"CREATE TRIGGER {fts_table}_insert AFTER INSERT ON {table_name} BEGIN {insert_new} END")
+    conn.execute(f"CREATE TRIGGER {fts_table}_delete AFTER DELETE ON {table_name} BEGIN {delete_old} END")
+    conn.execute(f"""
+        CREATE TRIGGER {fts_table}_update AFTER UPDATE OF {code_col}, {name_col}, ministry_code ON {table_name}
+        BEGIN {delete_old} {insert_new} END
+    """)
+    conn.execute(f"""
+        INSERT INTO {fts_table} (rowid, {code_col}, {name_col}, ministry_name)
+        SELECT t.id, t.{code_col}, t.{name_col}, m.name
+        FROM {table_name} t LEFT JOIN ministries m ON t.ministry_code = m.code
+    """)
@@ -1,5 +1,6 @@
 import sqlite3
 import os
+from schema_ops import SEARCH_COLUMNS, create_record_indexes, ensure_search_index, fts5_available
 
 # Define the database file path
 DB_FILE = 'legisq.db'
@@ -90,6 +91,19 @@ def initialize_database():
         )
     """)
 
+    # --- 6. Indexes (same set as the app's own schema check)
+    create_record_indexes(cursor)
+
+    # --- 7. Full-Text Search Indexes (FTS5)
+    # Same DDL, triggers and backfill of existing rows as the app's own schema check.
+    # Skipped on SQLite builds without FTS5; searches then use the instr() fallback.
+    if fts5_available():
+        for table in SEARCH_COLUMNS:
+            ensure_search_index(conn, table)
+
+    # Refresh planner statistics so the indexes above are picked.
+    cursor.execute("ANALYZE")
+
     conn.commit()
     conn.close()
     
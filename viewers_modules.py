@@ -1,9 +1,62 @@
 import streamlit as st
-import pandas as pd
+import numpy as np
 import os
-from database_ops import fetch_bills, fetch_search_suggestions, fetch_current_affairs, fetch_questions
+from database_ops import fetch_bills, search_suggestions, fetch_current_affairs, fetch_questions
 from ai_services import get_ai_summary
 
+# Rows per viewer page (keyset-paginated in fetch_bills/fetch_questions); each page fetch asks for one extra
+# row, which only tells split_page() whether a next page exists.
+PAGE_SIZE = 20
+
+# Sort selectbox label -> sort_by key of database_ops.SORT_KEYS (the ordering itself runs in SQL).
+BILL_SORT_OPTIONS = {"Introduced Date (Newest)": 'date', "Status": 'status', "Alphabetical (Bill Name)": 'name'}
+QUESTION_SORT_OPTIONS = {"Date (Newest)": 'date', "Status": 'status', "Type": 'type'}
+
+def get_page_cursor(cursor_key, query_state):
+    """Returns the current page's sort-key cursor (None for the first page), reset whenever query_state changes."""
+    if st.session_state.get(f"{cursor_key}_query") != query_state:
+        st.session_state[f"{cursor_key}_query"] = query_state
+        st.session_state[cursor_key] = None
+    return st.session_state.get(cursor_key)
+
+def render_page_controls(cursor_key, next_cursor):
+    """'First page' / 'Next page' buttons; next_cursor is None when there is no further page."""
+    col_first, col_next = st.columns(2)
+    with col_first:
+        if st.button("⏮️ First page", key=f"{cursor_key}_first", disabled=st.session_state.get(cursor_key) is None):
+            st.session_state[cursor_key] = None
+            st.rerun()
+    with col_next:
+        if st.button("Next page ⏭️", key=f"{cursor_key}_next", disabled=next_cursor is None):
+            st.session_state[cursor_key] = next_cursor
+            st.rerun()
+
+def split_page(df):
+    """Splits a PAGE_SIZE + 1 row fetch into (page, next_cursor); next_cursor is None on the last page."""
+    if len(df) <= PAGE_SIZE:
+        return df, None
+    page = df.iloc[:PAGE_SIZE].copy()
+    # to_dict() yields native Python scalars; sqlite3 cannot bind numpy ints
+    return page, tuple(page.filter(regex=r"^sort_k\d+$").iloc[-1].to_dict().values())
+
+def render_pdf_download(pdf_path, label, key):
+    """Two-step PDF download: the file is only read once the user asks for it."""
+    prepared = st.session_state.setdefault('prepared_downloads', set())
+    if key not in prepared:
+        if st.button(f"📄 Prepare {label}", key=f"prep_{key}"):
+            prepared.add(key)
+            st.rerun()
+        return
+
+    with open(pdf_path, "rb") as file:
+        st.download_button(
+            label=f"⬇️ Download {label}",
+            data=file,
+            file_name=os.path.basename(pdf_path),
+            mime="application/pdf",
+            key=key 
+        )
+
 # ==============================================================================
 # 1. BILLS VIEWER (R)
 # ==============================================================================
@@ -28,12 +81,20 @@ def render_bills_viewer(legislative_body):
             # we rely on the data already fetched by fetch_bills to show state names.
             st.markdown("**(Filter is based on search/sort)**") 
         
+    with col_sort:
+        sort_by = st.selectbox("Sort By", list(BILL_SORT_OPTIONS), key=f"{legislative_body}_sort")
+    
     with col_search:
         raw_search_query = st.text_input("Search Bills by Code, Name, or Ministry", 
                                         key=f"{legislative_body}_search_input", 
                                         placeholder="Start typing to see suggestions...")
 
-        suggestions = fetch_search_suggestions(legislative_body, raw_search_query)
+        # Suggestions come from the first results page for the typed text; when no suggestion is picked
+        # that is the very page shown below, so typing costs one (cached) query instead of two.
+        suggestions = []
+        if len(raw_search_query.strip()) >= 2:
+            df_hits = fetch_bills(legislative_body, raw_search_query, sort_by=BILL_SORT_OPTIONS[sort_by], page_size=PAGE_SIZE + 1, after=None)
+            suggestions = search_suggestions(df_hits, 'bills', raw_search_query)
 
         if suggestions:
             selected_suggestion = st.selectbox("Did you mean?", options=[''] + suggestions, index=0, key=f"{legislative_body}_suggestion")
@@ -42,82 +103,72 @@ def render_bills_viewer(legislative_body):
             final_search_query = raw_search_query
             st.info("No suggestions found or start typing (min 2 characters).")
 
-
-    with col_sort:
-        sort_by = st.selectbox("Sort By", ["Introduced Date (Newest)", "Status", "Alphabetical (Bill Name)"], key=f"{legislative_body}_sort")
-    
     # --- Fetch and Filter Data ---
-    df_bills = fetch_bills(legislative_body, final_search_query) 
+    cursor_key = f"{legislative_body}_cursor"
+    cursor = get_page_cursor(cursor_key, (final_search_query, sort_by))
+    df_bills = fetch_bills(legislative_body, final_search_query, sort_by=BILL_SORT_OPTIONS[sort_by], page_size=PAGE_SIZE + 1, after=cursor) 
+    df_bills, next_cursor = split_page(df_bills)
 
     # Note: State filtering is handled effectively by the search/query in fetch_bills
     
     if df_bills.empty:
         st.warning("No Bills found matching your criteria.")
+        if cursor:
+            render_page_controls(cursor_key, next_cursor)
         return
 
-    # --- Apply Client-Side Sorting ---
-    if sort_by == "Status":
-        status_order = ['Passed', 'Pending', 'Not Passed']
-        df_bills['status_sort'] = pd.Categorical(df_bills['current_status'], categories=status_order, ordered=True)
-        df_bills = df_bills.sort_values('status_sort')
-    elif sort_by == "Alphabetical (Bill Name)":
-        df_bills = df_bills.sort_values('bill_name')
-
-    st.markdown(f"**Showing {len(df_bills)} Bills**")
+    st.markdown(f"**Showing {len(df_bills)} Bills on this page**")
     st.markdown("---")
 
 
     # --- Display Results ---
-    for index, row in df_bills.iterrows():
+    # One existence check per row, reused by the download block and the AI-summary button
+    df_bills['pdf_exists'] = df_bills['pdf_path'].map(lambda path: bool(path) and os.path.exists(path))
+    # Status/approval badges computed column-wise instead of branching per expander
+    df_bills['status_icon'] = df_bills['current_status'].map({'Passed': "🟢 Passed", 'Not Passed': "🔴 Not Passed"}).fillna("🟡 Pending")
+    df_bills['approval_icon'] = np.select([df_bills['approval_result'].eq('Yes'), df_bills['approval_result'].eq('No')], ["✅", "❌"], default="❓")
+
+    for row in df_bills.itertuples(index=False):
         
-        display_name = f" - State: {row['state_name']}" if is_state_assembly else ""
+        display_name = f" - State: {row.state_name}" if is_state_assembly else ""
         
-        with st.expander(f"**{row['bill_code']}** - {row['bill_name']} {display_name}"):
-            
-            if row['current_status'] == 'Passed': status_icon = "🟢 Passed"
-            elif row['current_status'] == 'Not Passed': status_icon = "🔴 Not Passed"
-            else: status_icon = "🟡 Pending"
+        with st.expander(f"**{row.bill_code}** - {row.bill_name} {display_name}"):
             
-            st.markdown(f"### {row['bill_name']} {display_name}")
-            st.markdown(f"**Introduced By:** {row['introduced_by']}")
-            st.markdown(f"**Ministry:** {row['ministry_name']}")
-            st.markdown(f"**Date Introduced:** {row['introduced_date']}")
-            st.markdown(f"**Current Status:** {status_icon}")
+            st.markdown(f"### {row.bill_name} {display_name}")
+            st.markdown(f"**Introduced By:** {row.introduced_by}")
+            st.markdown(f"**Ministry:** {row.ministry_name}")
+            st.markdown(f"**Date Introduced:** {row.introduced_date}")
+            st.markdown(f"**Current Status:** {row.status_icon}")
 
             st.markdown("---")
             
             col_detail_1, col_detail_2, col_detail_3 = st.columns(3)
             
             with col_detail_1:
-                st.metric("Votes in Favour", row['votes_favour'])
+                st.metric("Votes in Favour", row.votes_favour)
             with col_detail_2:
-                st.metric("Votes Against", row['votes_against'])
+                st.metric("Votes Against", row.votes_against)
             with col_detail_3:
-                approval_icon = "✅" if row['approval_result'] == 'Yes' else ("❌" if row['approval_result'] == 'No' else "❓")
-                st.metric(row['approval_status'], f"{approval_icon} {row['approval_result']}")
+                st.metric(row.approval_status, f"{row.approval_icon} {row.approval_result}")
             
             st.markdown("---")
 
-            pdf_path = row['pdf_path']
+            pdf_path = row.pdf_path
             col_pdf_dl, col_ai = st.columns(2)
 
             with col_pdf_dl:
-                if pdf_path and os.path.exists(pdf_path):
-                    with open(pdf_path, "rb") as file:
-                        st.download_button(
-                            label="⬇️ Download Bill PDF",
-                            data=file,
-                            file_name=os.path.basename(pdf_path),
-                            mime="application/pdf",
-                            key=f"dl_bill_{row['bill_code']}" 
-                        )
+                if row.pdf_exists:
+                    render_pdf_download(pdf_path, "Bill PDF", f"dl_bill_{row.bill_code}")
                 else:
                     st.warning("No downloadable PDF available.")
 
             with col_ai:
-                if st.button("🧠 Get AI Summary", key=f"ai_summary_bill_{row['bill_code']}", disabled=(not pdf_path or not os.path.exists(pdf_path))):
+                if st.button("🧠 Get AI Summary", key=f"ai_summary_bill_{row.bill_code}", disabled=not row.pdf_exists):
                     get_ai_summary(pdf_path) 
 
+    st.markdown("---")
+    render_page_controls(cursor_key, next_cursor)
+
 
 # ==============================================================================
 # 2. QUESTIONS VIEWER (R)
@@ -132,11 +183,17 @@ def render_questions_viewer():
     with col_body:
         body_type = st.selectbox("Filter by Legislative Body", ['Lok Sabha', 'Rajya Sabha', 'State Assembly'], key='qn_viewer_body')
     
+    with col_sort:
+        sort_by = st.selectbox("Sort By", list(QUESTION_SORT_OPTIONS), key='qn_sort')
+    
     with col_search:
         raw_search_query = st.text_input("Search Questions by Code, Title, or Ministry", key='qn_search_input', placeholder="Start typing...")
         
-        # NOTE: Search suggestions for questions is simplified here
-        suggestions = fetch_search_suggestions(body_type, raw_search_query) 
+        # Suggestions come from the first results page for the typed text (see render_bills_viewer)
+        suggestions = []
+        if len(raw_search_query.strip()) >= 2:
+            df_hits = fetch_questions(body_type, raw_search_query, sort_by=QUESTION_SORT_OPTIONS[sort_by], page_size=PAGE_SIZE + 1, after=None)
+            suggestions = search_suggestions(df_hits, 'questions', raw_search_query)
 
         if suggestions:
             selected_suggestion = st.selectbox("Did you mean?", options=[''] + suggestions, index=0, key='qn_suggestion')
@@ -145,62 +202,54 @@ def render_questions_viewer():
             final_search_query = raw_search_query
             st.info("No suggestions found.")
 
-    with col_sort:
-        sort_by = st.selectbox("Sort By", ["Date (Newest)", "Status", "Type"], key='qn_sort')
-    
-    df_qns = fetch_questions(body_type, final_search_query)
+    cursor_key = "qn_cursor"
+    cursor = get_page_cursor(cursor_key, (body_type, final_search_query, sort_by))
+    df_qns = fetch_questions(body_type, final_search_query, sort_by=QUESTION_SORT_OPTIONS[sort_by], page_size=PAGE_SIZE + 1, after=cursor)
+    df_qns, next_cursor = split_page(df_qns)
     
     if df_qns.empty:
         st.warning(f"No {body_type} Questions found matching your criteria.")
+        if cursor:
+            render_page_controls(cursor_key, next_cursor)
         return
 
-    # --- Apply Client-Side Sorting ---
-    if sort_by == "Status":
-        status_order = ['Answered', 'Not Answered']
-        df_qns['status_sort'] = pd.Categorical(df_qns['current_status'], categories=status_order, ordered=True)
-        df_qns = df_qns.sort_values('status_sort', ascending=False)
-    elif sort_by == "Type":
-        df_qns = df_qns.sort_values('q_type')
-
-    st.markdown(f"**Showing {len(df_qns)} Questions**")
+    st.markdown(f"**Showing {len(df_qns)} Questions on this page**")
     st.markdown("---")
 
-    for index, row in df_qns.iterrows():
-        display_state = f" - State: {row['state_name']}" if row['state_name'] else ""
+    # One existence check per row, reused by the download block and the AI-summary button
+    df_qns['pdf_exists'] = df_qns['pdf_path'].map(lambda path: bool(path) and os.path.exists(path))
+    df_qns['status_icon'] = np.where(df_qns['current_status'].eq('Answered'), "✅", "❌")
+
+    for row in df_qns.itertuples(index=False):
+        display_state = f" - State: {row.state_name}" if row.state_name else ""
         
-        with st.expander(f"**{row['question_code']}** - {row['question_title']} {display_state}"):
+        with st.expander(f"**{row.question_code}** - {row.question_title} {display_state}"):
             
-            status_icon = "✅" if row['current_status'] == 'Answered' else "❌"
-            
-            st.markdown(f"### {row['question_title']}")
+            st.markdown(f"### {row.question_title}")
             st.markdown(f"**Body:** {body_type}{display_state}")
-            st.markdown(f"**Type:** {row['q_type']} ({status_icon})")
-            st.markdown(f"**Asked By:** {row['introduced_by']}")
-            st.markdown(f"**Ministry:** {row['ministry_name']}")
-            st.markdown(f"**Date Introduced:** {row['introduced_date']}")
+            st.markdown(f"**Type:** {row.q_type} ({row.status_icon})")
+            st.markdown(f"**Asked By:** {row.introduced_by}")
+            st.markdown(f"**Ministry:** {row.ministry_name}")
+            st.markdown(f"**Date Introduced:** {row.introduced_date}")
 
             st.markdown("---")
             
-            pdf_path = row['pdf_path']
+            pdf_path = row.pdf_path
             col_pdf_dl, col_ai = st.columns(2)
 
             with col_pdf_dl:
-                if pdf_path and os.path.exists(pdf_path):
-                    with open(pdf_path, "rb") as file:
-                        st.download_button(
-                            label="⬇️ Download Answer/Text PDF",
-                            data=file,
-                            file_name=os.path.basename(pdf_path),
-                            mime="application/pdf",
-                            key=f"dl_qn_{row['question_code']}" 
-                        )
+                if row.pdf_exists:
+                    render_pdf_download(pdf_path, "Answer/Text PDF", f"dl_qn_{row.question_code}")
                 else:
                     st.warning("No downloadable PDF available.")
 
             with col_ai:
-                if st.button("🧠 Get AI Summary", key=f"ai_summary_qn_{row['question_code']}", disabled=(not pdf_path or not os.path.exists(pdf_path))):
+                if st.button("🧠 Get AI Summary", key=f"ai_summary_qn_{row.question_code}", disabled=not row.pdf_exists):
                     get_ai_summary(pdf_path) 
 
+    st.markdown("---")
+    render_page_controls(cursor_key, next_cursor)
+
 
 # ==============================================================================
 # 3. CURRENT AFFAIRS VIEWER (R)
@@ -217,25 +266,18 @@ def render_ca_viewer():
         st.info("No current affairs records available.")
         return
 
-    for index, row in df_ca.iterrows():
+    for row in df_ca.itertuples(index=False):
         with st.container(border=True):
-            st.markdown(f"**{row['published_date']}** | ## {row['title']}")
-            st.write(row['description'])
+            st.markdown(f"**{row.published_date}** | ## {row.title}")
+            st.write(row.description)
             
             col_link, col_pdf = st.columns(2)
             
-            if row['url']:
+            if row.url:
                 with col_link:
-                    st.link_button("🌐 Read Full Article", row['url'], use_container_width=True)
+                    st.link_button("🌐 Read Full Article", row.url, use_container_width=True)
             
-            pdf_path = row['pdf_path']
+            pdf_path = row.pdf_path
             if pdf_path and os.path.exists(pdf_path):
                  with col_pdf:
-                    with open(pdf_path, "rb") as file:
-                        st.download_button(
-                            label="⬇️ Download Summary PDF",
-                            data=file,
-                            file_name=os.path.basename(pdf_path),
-                            mime="application/pdf",
-                            key=f"dl_ca_{row['id']}" 
-                        )
\ No newline at end of file
+                    render_pdf_download(pdf_path, "Summary PDF", f"dl_ca_{row.id}")
\ No newline at end of file